@@ -1,8 +1,13 @@
 import pandas as pd
 from dataclasses import dataclass
-from datetime import  date, datetime
+from datetime import  date
 
-@dataclass
+_BONUS_THRESHOLD_DAYS = 5*365
+
+def format_department_report(name: str, total_employees: int, avg_salary: float, total_salary: float) -> str:
+    return f"Department name: {name}\nTotal employees: {total_employees}\nAVG salary: {avg_salary}\nTOTAL salary: {total_salary}\n\n"
+
+@dataclass(slots=True)
 class Employee:
     name: str
     employee_id: str
@@ -16,12 +21,10 @@ class Employee:
     def update_salary(self) -> None:
         self.salary *= 1.1
 
-    def eligible_for_bonus(self) -> bool:
-        today = datetime.now().date()
-        diff = today - self.hire_date
-        if diff.days/365 < 5:
-            return False
-        return True
+    def eligible_for_bonus(self, today: date | None = None) -> bool:
+        if today is None:
+            today = date.today()
+        return (today - self.hire_date).days >= _BONUS_THRESHOLD_DAYS
     
 @dataclass
 class Department:
@@ -31,42 +34,31 @@ class Department:
     def add_employee(self, employee: Employee) -> None:
         self.employees.append(employee)
 
+    def calculate_total_salary(self) -> float:
+        return sum(employee.salary for employee in self.employees)
+
     def calculate_avg_salary(self) -> float:
-        salaries = [employee.salary for employee in self.employees]
-        return sum(salaries)/len(salaries)
+        return self.calculate_total_salary()/len(self.employees)
     
     def report(self) -> str:
-        total_salary = sum([employee.salary for employee in self.employees])
-        return f"Department name: {self.name}\nTotal employees: {len(self.employees)}\nAVG salary: {self.calculate_avg_salary()}\nTOTAL salary: {total_salary}\n\n"
+        total_employees = len(self.employees)
+        total_salary = self.calculate_total_salary()
+        return format_department_report(self.name, total_employees, total_salary/total_employees, total_salary)
     
     def eligible_for_bonus(self) -> list[Employee]|None:
-        return [employee.eligible_for_bonus() for employee in self.employees]
+        today = date.today()
+        return [employee.eligible_for_bonus(today) for employee in self.employees]
 
 
 def main():
-    departments = dict()
     # test_user = Employee("Bob", 5555, "Design", 6000, hire_date=date(2015, 12, 5))
     # print(test_user.display())
     # print(test_user.eligible_for_bonus())
-    df = pd.read_csv("test.csv")
-    for index, row in df.iterrows():
-
-        hire_date = datetime.strptime(row['hire_date'], '%Y-%m-%d').date()
-        employee = Employee(
-        name=row['name'],
-        employee_id=row['employee_id'],
-        department=row['department'],
-        salary=row['salary'],
-        hire_date=hire_date
-        )
-
-        if employee.department in departments:
-            departments[employee.department].add_employee(employee)
-        else:
-            departments[employee.department] = Department(employees=[employee], name=employee.department)
+    df = pd.read_csv("test.csv", engine='pyarrow', dtype_backend='pyarrow')
+    report_df = df.groupby('department', sort=False, dropna=False)['salary'].agg(total='sum', avg='mean', n='size')
 
-    for _, department in departments.items():
-        print(department.report())
+    for name, total_salary, avg_salary, total_employees in report_df.itertuples(name=None):
+        print(format_department_report(name, total_employees, avg_salary, total_salary))
 
 if __name__ == "__main__":
     main()
@@ -1,17 +1,29 @@
 import logging
 import os
+import secrets
+import threading
 import time
 import zlib
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import TypedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, TypedDict
 
-import requests
+import google_crc32c
+import httpx
+import orjson
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 # Constants
 PAUSE_DURATION = 20  # Duration to wait between synchronization cycles
+MAX_FETCH_WORKERS = 16  # Upper bound on concurrent Google Sheets / Gridly fetches
+GRIDLY_BATCH_SIZE = 500  # Maximum number of records sent in a single Gridly bulk request
+WEBHOOK_CHANNEL_TTL = 24 * 60 * 60  # Requested lifetime of a Drive notification channel (Drive caps it at one day)
+WEBHOOK_RENEW_MARGIN = 5 * 60  # Renew the notification channel this many seconds before it expires
+WEBHOOK_FALLBACK_INTERVAL = 10 * 60  # Safety-net sync interval when push notifications are enabled
 
 # Environment variables for configuration
 PLAYRIX_SPREAD_SHEET_ID = os.environ["PLAYRIX_SPREAD_SHEET_ID"]
@@ -19,6 +31,9 @@ GOOGLE_CRED_PATH = os.environ["GOOGLE_CRED_PATH"]
 GRIDLY_API_KEY = os.environ["GRIDLY_API_KEY"]
 GRIDLY_DATABASE_ID = os.environ["GRIDLY_DATABASE_ID"]
 SHEET_NAMES = os.environ["SHEET_NAMES"]
+# Optional: public HTTPS URL that forwards to WEBHOOK_PORT; enables push notifications instead of polling
+WEBHOOK_ADDRESS = os.environ.get("WEBHOOK_ADDRESS")
+WEBHOOK_PORT = int(os.environ.get("WEBHOOK_PORT", "8080"))
 
 # Type definitions for Gridly API responses
 class Cell(TypedDict):
@@ -39,75 +54,86 @@ class View(TypedDict):
     gridId: str
 
 # Data classes to store checksum and row data for efficient change detection
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RowChecksum:
     row_id: int
     row_checksum: int
-    row_content: list[str]
+    row_content: tuple[str, ...]  # A tuple keeps frozen instances hashable
 
 @dataclass
 class SheetChecksum:
     sheet_title: str
     reference: str | None = None  # Reference view ID for the Gridly sheet
-    hashed_rows: list[RowChecksum] = None
+    hashed_rows: list[RowChecksum] = None  # Indexed by row_id
+    checksums: dict[int, int] = None  # row_id -> row_checksum, built once for diffing
 
     def __post_init__(self):
         if self.hashed_rows is None:
             self.hashed_rows = []
+        if self.checksums is None:
+            self.checksums = {row.row_id: row.row_checksum for row in self.hashed_rows}
 
 # Client to interact with the Gridly API
 class GridlyClient:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://api.gridly.com/v1"
-        self.session = requests.Session()
-        self.session.headers.update({
+        # HTTP/2 lets concurrent sync threads multiplex requests over one pooled connection.
+        # httpx defaults to a 5 s timeout, too short for large record fetches and bulk writes
+        self.client = httpx.Client(http2=True, timeout=httpx.Timeout(60.0, connect=10.0), headers={
             "Authorization": f"ApiKey {api_key}",
             "Content-Type": "application/json"
         })
 
     # Execute API requests with method and endpoint
-    def execute_api_request(self, method: str, endpoint: str, body: dict | None = None) -> dict:
+    def execute_api_request(self, method: str, endpoint: str, body: dict | list | None = None) -> dict:
         url = f"{self.base_url}{endpoint}"
-        response = self.session.request(method, url, json=body)
+        # orjson emits compact JSON and parses responses straight from the raw bytes
+        data = orjson.dumps(body) if body is not None else None
+        response = self.client.request(method, url, content=data)
         response.raise_for_status()
-        return response.json() if response.content else {}
-
-    # Add new rows to a specific Gridly view
+        return orjson.loads(response.content) if response.content else {}
+
+    # Send records to a Gridly view in bulk requests of at most GRIDLY_BATCH_SIZE records
+    def _send_records_in_batches(self, method: str, endpoint: str, records: list[Record]) -> None:
+        for start in range(0, len(records), GRIDLY_BATCH_SIZE):
+            self.execute_api_request(method, endpoint, records[start:start + GRIDLY_BATCH_SIZE])
+
+    # Convert rows into Gridly records; column ids are formatted once per call, not per cell
+    @staticmethod
+    def _build_records(rows: list[RowChecksum]) -> list[Record]:
+        if not rows:
+            return []
+
+        n_cols = max(len(row.row_content) - 1 for row in rows)
+        column_ids = [f"column{i+1}" for i in range(n_cols)]
+
+        return [
+            {
+                "id": row.row_content[0],
+                "cells": [
+                    {"columnId": column_id, "value": value}
+                    for column_id, value in zip(column_ids, row.row_content[1:], strict=False)
+                ],
+            }
+            for row in rows
+        ]
+
+    # Add new rows to a specific Gridly view, in bulk batches
     def add_rows_to_gridly(self, view_id: str, new_rows: list[RowChecksum]) -> None:
         endpoint = f"/views/{view_id}/records"
-        records = []
-        
-        for row in new_rows:
-            record_id = row.row_content[0]
-            column_values = row.row_content[1:]
-            
-            cells = [
-                {"columnId": f"column{i+1}", "value": value}
-                for i, value in enumerate(column_values)
-            ]
-            
-            records.append({"id": record_id, "cells": cells})
+        records = self._build_records(new_rows)
 
-        self.execute_api_request("POST", endpoint, records)
+        self._send_records_in_batches("POST", endpoint, records)
         logging.info("New rows were added to Gridly.")
 
-    # Update existing rows in Gridly if changes are detected
+    # Update existing rows in Gridly if changes are detected, in bulk batches
     def update_gridly_row(self, view_id: str, rows: list[RowChecksum]) -> None:
-        for row in rows:
-            record_id = row.row_content[0]
-            column_values = row.row_content[1:]
-            
-            cells = [
-                {"columnId": f"column{i+1}", "value": value}
-                for i, value in enumerate(column_values)
-            ]
-            
-            record = {"id": record_id, "cells": cells}
-            endpoint = f"/views/{view_id}/records/{record_id}"
-            
-            self.execute_api_request("PATCH", endpoint, record)
-            logging.info(f"Successfully updated record {record_id}")
+        endpoint = f"/views/{view_id}/records"
+        records = self._build_records(rows)
+
+        self._send_records_in_batches("PATCH", endpoint, records)
+        logging.info(f"Successfully updated {len(records)} records")
 
     # Retrieve grids in the Gridly database
     def fetch_grids_by_database_id(self, database_id: str) -> list[Grid]:
@@ -130,11 +156,59 @@ class GridlyClient:
 # Client to interact with Google Sheets API
 class SheetsClient:
     def __init__(self):
-        self.service = self._build_service()
+        self.credentials = Credentials.from_service_account_file(GOOGLE_CRED_PATH)
+        self._local = threading.local()
+
+    # googleapiclient services are not thread-safe, so every worker thread gets its own
+    @property
+    def service(self):
+        if not hasattr(self._local, "service"):
+            self._local.service = self._build_service()
+        return self._local.service
+
+    @property
+    def drive_service(self):
+        if not hasattr(self._local, "drive_service"):
+            self._local.drive_service = build("drive", "v3", credentials=self.credentials)
+        return self._local.drive_service
 
     def _build_service(self):
-        creds = Credentials.from_service_account_file(GOOGLE_CRED_PATH)
-        return build("sheets", "v4", credentials=creds)
+        return build("sheets", "v4", credentials=self.credentials)
+
+    # Retrieve the last modification time of a spreadsheet to detect unchanged sheets cheaply.
+    # Errors are left to the caller, which logs them and falls back to a full sync
+    def get_modified_time(self, spreadsheet_id: str) -> str:
+        result = self.drive_service.files().get(
+            fileId=spreadsheet_id,
+            fields="modifiedTime"
+        ).execute()
+        return result["modifiedTime"]
+
+    # Register a Drive push notification channel that POSTs to address when the spreadsheet changes
+    def watch_file(self, spreadsheet_id: str, channel_id: str, address: str, token: str, ttl: int) -> dict:
+        try:
+            return self.drive_service.files().watch(
+                fileId=spreadsheet_id,
+                body={
+                    "id": channel_id,
+                    "type": "web_hook",
+                    "address": address,
+                    "token": token,
+                    "expiration": int((time.time() + ttl) * 1000),
+                }
+            ).execute()
+        except HttpError as error:
+            logging.error(f"Error registering Drive notification channel: {error}")
+            raise
+
+    # Stop a previously registered Drive push notification channel
+    def stop_channel(self, channel_id: str, resource_id: str) -> None:
+        try:
+            self.drive_service.channels().stop(
+                body={"id": channel_id, "resourceId": resource_id}
+            ).execute()
+        except Exception as error:  # Best effort: an unstopped channel simply expires on its own
+            logging.error(f"Error stopping Drive notification channel: {error}")
 
     # Retrieve data from a specific Google Sheet range
     def get_sheet_data(self, spreadsheet_id: str, range_name: str):
@@ -149,53 +223,73 @@ class SheetsClient:
             raise
 
 # Compute a checksum for a row based on its contents for change detection
-def compute_row_hash(row_data: list[str]) -> int:
-    concatenated = "".join(row_data)
-    return zlib.crc32(concatenated.encode())
+# (cells are fed to the CRC incrementally, so no joined row string is built)
+def _crc32c_row_hash(row_data: list[str]) -> int:
+    extend = google_crc32c.extend  # Plain int running CRC: no Checksum object or digest round-trip
+    checksum = 0
+    for cell in row_data:
+        checksum = extend(checksum, cell.encode())
+    return checksum
+
+def _zlib_row_hash(row_data: list[str]) -> int:
+    checksum = 0
+    for cell in row_data:
+        checksum = zlib.crc32(cell.encode(), checksum)
+    return checksum
+
+# google-crc32c silently degrades to pure Python without its C extension; zlib's C CRC32 is far faster then
+compute_row_hash = _crc32c_row_hash if google_crc32c.implementation == "c" else _zlib_row_hash
+
+# Hash all rows of a sheet in a single pass; row ids are the row positions
+def hash_rows(rows: list[list[str]]) -> list[RowChecksum]:
+    row_hash = compute_row_hash
+    return [RowChecksum(row_id, row_hash(row), tuple(row)) for row_id, row in enumerate(rows)]
 
 # Process each Google Sheet and generate row checksums
-def process_sheet(title: str, sheets_client: SheetsClient, 
-                 sheet_hashes: dict[str, SheetChecksum]) -> None:
+def process_sheet(title: str, sheets_client: SheetsClient) -> SheetChecksum | None:
     try:
         data = sheets_client.get_sheet_data(PLAYRIX_SPREAD_SHEET_ID, title)
         if not data:
-            return
+            return None
 
-        hashed_rows = []
-        for i, row in enumerate(data[1:], 1):  # Skip header row
-            row_checksum = compute_row_hash(row)
-            hashed_rows.append(RowChecksum(i-1, row_checksum, row))
+        hashed_rows = hash_rows(data[1:])  # Skip header row
 
-        sheet_hashes[title] = SheetChecksum(
+        logging.info(f"All columns of sheet with title {title} were hashed")
+        return SheetChecksum(
             sheet_title=title,
             hashed_rows=hashed_rows
         )
-        logging.info(f"All columns of sheet with title {title} were hashed")
     
     except Exception as e:
         logging.error(f"Error processing sheet {title}: {e}")
+        return None
 
 # Process each Gridly grid and generate row checksums
-def process_gridly_grid(grid: Grid, gridly_sheets: dict[str, SheetChecksum], 
-                       client: GridlyClient) -> None:
+def process_gridly_grid(grid: Grid, client: GridlyClient) -> SheetChecksum | None:
     try:
-        gridly_sheet = SheetChecksum(sheet_title=grid['name'])
         view = client.fetch_grid_view(grid['id'])
-        gridly_sheet.reference = view['id']
-        
         records = client.fetch_records_for_view(view['id'])
         
-        for i, record in enumerate(records):
-            processed_rows = [record['id']] + [cell['value'] for cell in record['cells']]
-            row_hash = compute_row_hash(processed_rows)
-            gridly_sheet.hashed_rows.append(
-                RowChecksum(i, row_hash, processed_rows)
-            )
+        processed_rows = [
+            [record['id']] + [cell['value'] for cell in record['cells']]
+            for record in records
+        ]
         
-        gridly_sheets[grid['name']] = gridly_sheet
+        return SheetChecksum(
+            sheet_title=grid['name'],
+            reference=view['id'],
+            hashed_rows=hash_rows(processed_rows)
+        )
     
     except Exception as e:
         logging.error(f"Error processing Gridly grid {grid['name']}: {e}")
+        return None
+
+# Run independent network-bound tasks on the shared thread pool and key the results by sheet title
+def fetch_concurrently(executor: ThreadPoolExecutor, task: Callable[[Any], SheetChecksum | None],
+                       items: list) -> dict[str, SheetChecksum]:
+    results = executor.map(task, items)
+    return {sheet.sheet_title: sheet for sheet in results if sheet is not None}
 
 # Compare rows in Google Sheets and Gridly to identify differences
 def sheets_equal(gridly_title: str, hashed_sheet: SheetChecksum, 
@@ -203,17 +297,15 @@ def sheets_equal(gridly_title: str, hashed_sheet: SheetChecksum,
     if gridly_title not in google_sheets:
         return None
 
-    rows_to_push = []
     google_sheet = google_sheets[gridly_title]
-    
-    # Create a dictionary for better performance
-    hashed_sheet_dict = {row.row_id: row.row_checksum for row in hashed_sheet.hashed_rows}
-
-    for row in google_sheet.hashed_rows:
-        if (row.row_id in hashed_sheet_dict and hashed_sheet_dict[row.row_id] != row.row_checksum):
-            rows_to_push.append(row)
+    gridly_checksums = hashed_sheet.checksums
 
-    return rows_to_push
+    # Rows missing from Gridly compare equal here; they are picked up by find_new_rows
+    return [
+        google_sheet.hashed_rows[row_id]
+        for row_id, checksum in google_sheet.checksums.items()
+        if gridly_checksums.get(row_id, checksum) != checksum
+    ]
 
 # Detect new rows in Google Sheets that don't exist in Gridly
 def find_new_rows(current_google_hash: dict[str, SheetChecksum], 
@@ -222,12 +314,82 @@ def find_new_rows(current_google_hash: dict[str, SheetChecksum],
         return None
         
     google_sheet = current_google_hash[gridly_sheet.sheet_title]
-    diff = len(google_sheet.hashed_rows) - len(gridly_sheet.hashed_rows)
+    new_ids = google_sheet.checksums.keys() - gridly_sheet.checksums.keys()
     
-    if diff <= 0:
+    if not new_ids:
         return None
     
-    return google_sheet.hashed_rows[-diff:]
+    return [google_sheet.hashed_rows[row_id] for row_id in sorted(new_ids)]
+
+# HTTP handler for Drive push notifications; wakes up the sync loop on spreadsheet changes
+class ChangeNotificationHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        watcher: DriveWatcher = self.server.watcher
+        channel_token = self.headers.get("X-Goog-Channel-Token", "")
+        if not secrets.compare_digest(channel_token.encode(), watcher.token.encode()):
+            self.send_response(403)
+            self.end_headers()
+            return
+
+        # The initial "sync" message only confirms that the channel was created
+        if self.headers.get("X-Goog-Resource-State") != "sync":
+            watcher.changed.set()
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.debug(f"Notification listener: {format % args}")
+
+# Keeps a Drive notification channel alive and lets the sync loop wait for changes
+class DriveWatcher:
+    def __init__(self, sheets_client: SheetsClient, spreadsheet_id: str, address: str, port: int):
+        self.sheets_client = sheets_client
+        self.spreadsheet_id = spreadsheet_id
+        self.address = address
+        self.token = secrets.token_urlsafe(32)
+        self.changed = threading.Event()
+        self.channel: dict | None = None
+        self.channel_expires = 0.0
+        self.server = ThreadingHTTPServer(("", port), ChangeNotificationHandler)
+        self.server.watcher = self
+
+    def start(self) -> None:
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.renew_channel()
+
+    # Register a fresh channel when the current one is about to expire, then stop the old one.
+    # Returns False if registration failed; the old channel (if any) is kept and renewal is retried on the next wait
+    def renew_channel(self) -> bool:
+        if self.channel and time.time() < self.channel_expires - WEBHOOK_RENEW_MARGIN:
+            return True
+
+        old_channel = self.channel
+        try:
+            new_channel = self.sheets_client.watch_file(
+                self.spreadsheet_id, secrets.token_hex(16), self.address, self.token, WEBHOOK_CHANNEL_TTL
+            )
+        except Exception as e:
+            logging.error(f"Could not register Drive notification channel, polling every {PAUSE_DURATION}s: {e}")
+            return False
+
+        self.channel = new_channel
+        self.channel_expires = int(self.channel["expiration"]) / 1000
+        logging.info(f"Drive notification channel registered until {time.ctime(self.channel_expires)}")
+
+        if old_channel:
+            self.sheets_client.stop_channel(old_channel["id"], old_channel["resourceId"])
+        return True
+
+    # Block until a change notification arrives, the fallback interval passes, or the channel needs renewal
+    # Falls back to the polling interval while the channel cannot be registered
+    def wait_for_change(self) -> None:
+        if self.renew_channel():
+            until_renewal = self.channel_expires - WEBHOOK_RENEW_MARGIN - time.time()
+            timeout = max(0.0, min(WEBHOOK_FALLBACK_INTERVAL, until_renewal))
+        else:
+            timeout = PAUSE_DURATION
+        self.changed.wait(timeout)
+        self.changed.clear()
 
 def main():
     # Set up logging with a specified format and level to capture INFO and ERROR messages
@@ -245,19 +407,35 @@ def main():
     # Initialize Google Sheets and Gridly clients
     sheets_client = SheetsClient()
     gridly_client = GridlyClient(GRIDLY_API_KEY)
+
+    # One pool for the life of the daemon: its long-lived threads keep their per-thread Sheets
+    # services (and their open connections) across sync cycles
+    executor = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS)
+
+    # Wait for Drive push notifications if a webhook address is configured, otherwise poll
+    watcher = None
+    if WEBHOOK_ADDRESS:
+        watcher = DriveWatcher(sheets_client, PLAYRIX_SPREAD_SHEET_ID, WEBHOOK_ADDRESS, WEBHOOK_PORT)
+        watcher.start()
+        logging.info(f"Listening for Drive change notifications on port {WEBHOOK_PORT}")
+
+    def wait_for_next_cycle() -> None:
+        if watcher:
+            watcher.wait_for_change()
+        else:
+            time.sleep(PAUSE_DURATION)
     
     try:
         # Initial processing: create a hash map of Google Sheet data for initial comparison
-        init_sheet_hash = {}
-        for title in sheet_names:
-            process_sheet(title, sheets_client, init_sheet_hash)  # Store checksums for each sheet
+        init_sheet_hash = fetch_concurrently(
+            executor, lambda title: process_sheet(title, sheets_client), sheet_names
+        )  # Store checksums for each sheet
 
         # Retrieve and process existing grids from Gridly for synchronization
-        gridly_sheets = {}
         grids = gridly_client.fetch_grids_by_database_id(GRIDLY_DATABASE_ID)
-        
-        for grid in grids:
-            process_gridly_grid(grid, gridly_sheets, gridly_client)  # Populate grid data from Gridly
+        gridly_sheets = fetch_concurrently(
+            executor, lambda grid: process_gridly_grid(grid, gridly_client), grids
+        )  # Populate grid data from Gridly
 
         logging.info("All initial sheets processed and checksums calculated.")
         
@@ -268,13 +446,28 @@ def main():
             logging.info(f"GRIDLY Sheet <{title}> <{status}> the initial Google Sheet")
         
         # Start a continuous loop to regularly check for updates in Google Sheets
+        last_modified = None
         while True:
             logging.info("Starting a new Gridly synchronization check...")
+
+            # Skip fetching and hashing entirely if the spreadsheet has not changed since the last cycle
+            try:
+                modified_time = sheets_client.get_modified_time(PLAYRIX_SPREAD_SHEET_ID)
+            except Exception as e:
+                # A transient Drive failure must not stop the daemon; fall through to a full fetch instead
+                logging.error(f"Could not check spreadsheet modified time, running a full sync: {e}")
+                modified_time = None
+
+            if modified_time is not None and modified_time == last_modified:
+                logging.info("Google Sheet is unchanged since the last check, skipping synchronization")
+                wait_for_next_cycle()
+                continue
+            last_modified = modified_time
             
             # Create a fresh hash map for the latest Google Sheet data
-            current_google_hash = {}
-            for title in sheet_names:
-                process_sheet(title, sheets_client, current_google_hash)  # Update checksums
+            current_google_hash = fetch_concurrently(
+                executor, lambda title: process_sheet(title, sheets_client), sheet_names
+            )  # Update checksums
 
             # Check and synchronize each Gridly sheet with the updated Google Sheet data
             for title, sheet in gridly_sheets.items():
@@ -288,7 +481,7 @@ def main():
 
                 # Identify new rows in Google Sheets to add to Gridly
                 new_rows = find_new_rows(current_google_hash, sheet)
-                logging.info("new rows that were added to Google: %s", new_rows)
+                logging.info("new rows that were added to Google: %s", [row.row_id for row in new_rows or []])
 
                 # Add any new rows from Google Sheets into the corresponding Gridly grid
                 if new_rows:
@@ -301,11 +494,13 @@ def main():
                 gridly_sheets = current_google_hash
                 
             
-            time.sleep(PAUSE_DURATION)
+            wait_for_next_cycle()
             
     except Exception as e:
         logging.error(f"Fatal error in main loop: {e}")
         raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 if __name__ == "__main__":
     main()
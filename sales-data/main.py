@@ -5,24 +5,34 @@ def generate_monthly_summary(df: pd.DataFrame):
     Generator function that yields monthly summaries of sales data.
     
     Parameters:
-    - df: DataFrame containing sales data with columns `date`, `sales`, and `customer_id`.
+    - df: DataFrame containing sales data with columns `order_date` (ISO `YYYY-MM-DD` strings), `price`, and `customer_id`.
     
     Yields:
     - A tuple (month, total_sales, unique_customers) for each month.
     """
 
-    df['order_date'] = pd.to_datetime(df['order_date'])
-    df['month'] = df['order_date'].dt.to_period('M')
-    
-    for month, group in df.groupby('month'):
-        total_sales = group['price'].sum()
-        unique_customers = group['customer_id'].nunique()
-        yield month, total_sales, unique_customers
+    # The month key is the `YYYY-MM` prefix of the ISO date, so no timestamp column is materialized;
+    # check the format once so other date layouts fail loudly instead of producing bogus months
+    if not df['order_date'].str.fullmatch(r'\d{4}-\d{2}-\d{2}').all():
+        raise ValueError("order_date values must be ISO `YYYY-MM-DD` dates")
+
+    summary = df.groupby(df['order_date'].str.slice(0, 7)).agg(
+        total_sales=('price', 'sum'),
+        unique_customers=('customer_id', 'nunique'),
+    )
+    yield from summary.itertuples(name=None)
 
 def main():
-    df = pd.read_csv("test.csv")
-    df = df.dropna()
-    df = df[(df['price'] > 15) & (df['quantity'] > 0)]
+    df = pd.read_csv(
+        "test.csv",
+        engine='pyarrow',
+        dtype_backend='pyarrow',
+        usecols=['order_date', 'price', 'quantity', 'customer_id'],
+        dtype={'order_date': 'string[pyarrow]'},
+    )
+    # Rows with a missing value in any loaded column are dropped, as dropna() did
+    mask = df.notna().all(axis=1) & df['price'].gt(15) & df['quantity'].gt(0)
+    df = df.loc[mask]
     print(f"data: {df}")
 
     for month, total_sales, unique_customers in generate_monthly_summary(df):